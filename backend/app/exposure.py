@@ -0,0 +1,100 @@
+"""
+Incremental maintenance of the cross-user symbol_exposure aggregate
+"""
+
+import os
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+
+EXPOSURE_SHARDS = int(os.getenv("EXPOSURE_SHARDS", "16"))
+
+class Position(NamedTuple):
+    symbol: str
+    quantity: float
+    price: float
+
+def snapshot(investment: models.Investment) -> Position:
+    return Position(investment.symbol, investment.quantity, investment.current_price)
+
+def _upsert(db: Session):
+    dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+    return dialect.insert(models.SymbolExposure)
+
+def record_position_changes(
+    db: Session,
+    user_id: int,
+    changes: Iterable[Tuple[Optional[Position], Optional[Position]]]
+):
+    """
+    Apply (before, after) position changes for one user to symbol_exposure.
+
+    Runs inside the caller's transaction so the aggregate commits or rolls back with
+    the trade. Deltas are merged per symbol and written with a single upsert, in a
+    stable order so concurrent writers lock shard rows consistently.
+    """
+    shard = user_id % EXPOSURE_SHARDS
+    deltas = defaultdict(lambda: [0.0, 0.0, 0])
+    for before, after in changes:
+        for position, sign in ((before, -1), (after, 1)):
+            if position is None:
+                continue
+            delta = deltas[position.symbol]
+            delta[0] += sign * position.quantity
+            delta[1] += sign * position.quantity * position.price
+            delta[2] += sign * (1 if position.quantity > 0 else 0)
+
+    rows = [
+        {
+            "symbol": symbol,
+            "shard": shard,
+            "total_quantity": quantity,
+            "market_value": market_value,
+            "holder_count": holder_count,
+        }
+        for symbol, (quantity, market_value, holder_count) in sorted(deltas.items())
+        if quantity or market_value or holder_count
+    ]
+    if not rows:
+        return
+
+    stmt = _upsert(db).values(rows)
+    table = models.SymbolExposure.__table__
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.symbol, table.c.shard],
+        set_={
+            "total_quantity": table.c.total_quantity + stmt.excluded.total_quantity,
+            "market_value": table.c.market_value + stmt.excluded.market_value,
+            "holder_count": table.c.holder_count + stmt.excluded.holder_count,
+            "updated_at": func.now(),
+        },
+    ))
+
+def record_position_change(db: Session, user_id: int, before: Optional[Position], after: Optional[Position]):
+    record_position_changes(db, user_id, [(before, after)])
+
+def rebuild_statement():
+    """INSERT ... SELECT of the per-shard totals computed from investments"""
+    shard = (models.Investment.user_id % EXPOSURE_SHARDS).label("shard")
+    source = select(
+        models.Investment.symbol,
+        shard,
+        func.sum(models.Investment.quantity),
+        func.sum(models.Investment.quantity * models.Investment.current_price),
+        func.count(models.Investment.id).filter(models.Investment.quantity > 0),
+    ).group_by(models.Investment.symbol, shard)
+    return insert(models.SymbolExposure).from_select(
+        ["symbol", "shard", "total_quantity", "market_value", "holder_count"],
+        source,
+    )
+
+def rebuild_symbol_exposure(db: Session):
+    """Recompute symbol_exposure from investments, e.g. after a backfill or to shed float drift."""
+    db.query(models.SymbolExposure).delete()
+    db.execute(rebuild_statement())
+    db.commit()
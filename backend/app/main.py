@@ -1,17 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, users, investments, transactions, portfolio
+from app.routers import auth, users, investments, transactions, portfolio, admin
 from app.database import engine
-from app import models
+from app import models, rate_limit, read_routing, profiling, outbox
 
 models.Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if outbox.OUTBOX_DISPATCHER_ENABLED:
+        outbox.dispatcher.start()
+    yield
+    outbox.dispatcher.stop()
+
 app = FastAPI(
     title="Manulife Investment Portfolio API",
     description="Investment portfolio management with authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Opt-in profiling: X-Profile: 1 from an admin user, or PROFILE_SAMPLE_RATE
+app.add_middleware(profiling.ProfilingMiddleware)
+
+# Keeps a user's reads on the primary for a short window after their own writes
+app.add_middleware(read_routing.ReadYourWritesMiddleware)
+
+# Rate limiting (registered before CORS so 429 responses still carry CORS headers)
+app.add_middleware(rate_limit.RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +45,7 @@ app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(investments.router, prefix="/investments", tags=["investments"])
 app.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
 app.include_router(portfolio.router, prefix="/portfolio", tags=["portfolio"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
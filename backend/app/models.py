@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Enum, CheckConstraint, Index, DDL, JSON, event, inspect
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, engine
 import enum
 
 class TransactionType(enum.Enum):
@@ -30,8 +30,42 @@ class User(Base):
     investments = relationship("Investment", back_populates="user")
     transactions = relationship("Transaction", back_populates="user")
 
+# Directory search on /users/search: text_pattern_ops serves prefix LIKE on lower(column)
+for _column in (User.username, User.email):
+    Index(
+        f"ix_users_{_column.key}_lower_pattern",
+        func.lower(_column).label(f"{_column.key}_lower_pattern"),
+        postgresql_ops={f"{_column.key}_lower_pattern": "text_pattern_ops"}
+    )
+
+def _pg_trgm_available(ddl, target, bind, **kw):
+    return bind.dialect.name == "postgresql" and bind.exec_driver_sql(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    ).first() is not None
+
+# Trigram GIN indexes serve substring LIKE; skipped where the pg_trgm contrib module is not installed
+for _statement in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_username_lower_trgm ON users USING gin (lower(username) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_lower_trgm ON users USING gin (lower(email) gin_trgm_ops)",
+):
+    event.listen(User.__table__, "after_create", DDL(_statement).execute_if(callable_=_pg_trgm_available))
+
 class Investment(Base):
     __tablename__ = "investments"
+    __table_args__ = (
+        # Last line of defence against overselling when concurrent trades race
+        CheckConstraint("quantity >= 0", name="ck_investments_quantity_non_negative"),
+        # Serves the allocation GROUP BY as an index-only scan
+        Index(
+            "ix_investments_user_id_asset_type",
+            "user_id",
+            "asset_type",
+            postgresql_include=["quantity", "current_price"],
+        ),
+        # Top holders of a symbol for the exposure endpoints
+        Index("ix_investments_symbol_quantity", "symbol", "quantity"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -48,19 +82,112 @@ class Investment(Base):
     user = relationship("User", back_populates="investments")
     transactions = relationship("Transaction", back_populates="investment")
 
+# Only Postgres gets the partitioned transactions table. Other databases (SQLite in tests)
+# keep a plain table with a single-column primary key, which they can autoincrement.
+PARTITION_TRANSACTIONS = engine.dialect.name == "postgresql"
+
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_id_transaction_date", "user_id", "transaction_date"),
+        Index("ix_transactions_investment_id", "investment_id"),
+        # Monthly range partitions are managed by maintain_partitions.py
+        {"postgresql_partition_by": "RANGE (transaction_date)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    # The partition key must be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     investment_id = Column(Integer, ForeignKey("investments.id"), nullable=False)
     transaction_type = Column(Enum(TransactionType, name='transactiontype'), nullable=False)
     quantity = Column(Float, nullable=False)
     price_per_unit = Column(Float, nullable=False)
     total_amount = Column(Float, nullable=False)
-    transaction_date = Column(DateTime(timezone=True), server_default=func.now())
+    transaction_date = Column(DateTime(timezone=True), primary_key=PARTITION_TRANSACTIONS, server_default=func.now())
     notes = Column(String, nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="transactions")
     investment = relationship("Investment", back_populates="transactions")
+
+# Catch-all partition so inserts never fail when a monthly partition is missing
+event.listen(
+    Transaction.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS transactions_default PARTITION OF transactions DEFAULT").execute_if(dialect="postgresql")
+)
+
+# Cold transaction history moved out of the partitioned table. Only indexed for per-user lookups.
+class TransactionArchive(Base):
+    __tablename__ = "transactions_archive"
+    __table_args__ = (
+        Index("ix_transactions_archive_user_id_transaction_date", "user_id", "transaction_date"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    investment_id = Column(Integer, nullable=False)
+    transaction_type = Column(Enum(TransactionType, name='transactiontype'), nullable=False)
+    quantity = Column(Float, nullable=False)
+    price_per_unit = Column(Float, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    transaction_date = Column(DateTime(timezone=True), nullable=False)
+    notes = Column(String, nullable=True)
+
+# Cross-user totals per symbol, maintained incrementally from the investment write paths.
+# Each symbol is split over shard rows (keyed by user_id) so trades by different users on a
+# popular symbol do not queue on one row; readers sum the shards.
+class SymbolExposure(Base):
+    __tablename__ = "symbol_exposure"
+
+    symbol = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    total_quantity = Column(Float, nullable=False, default=0.0)
+    market_value = Column(Float, nullable=False, default=0.0)
+    holder_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+def _backfill_symbol_exposure(target, connection, **kw):
+    # Created on a database that already holds positions (an upgrade): start from them,
+    # otherwise the first trade on an existing holding subtracts a position never added
+    from app.exposure import rebuild_statement
+    if inspect(connection).has_table(Investment.__tablename__):
+        connection.execute(rebuild_statement())
+
+event.listen(SymbolExposure.__table__, "after_create", _backfill_symbol_exposure)
+
+# Number of transactions per user (partitioned table plus archive) for the portfolio summary,
+# maintained incrementally by app/transaction_counts.py. Split over shard rows keyed by
+# investment_id; readers sum the shards.
+class TransactionCount(Base):
+    __tablename__ = "transaction_counts"
+
+    user_id = Column(Integer, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+def _backfill_transaction_counts(target, connection, **kw):
+    # Same as symbol_exposure: an upgraded database starts from the rows it already holds
+    from app.transaction_counts import rebuild_statement
+    tables = inspect(connection)
+    if tables.has_table(Transaction.__tablename__):
+        connection.execute(rebuild_statement(
+            include_archive=tables.has_table(TransactionArchive.__tablename__)
+        ))
+
+event.listen(TransactionCount.__table__, "after_create", _backfill_transaction_counts)
+
+# Trade events written in the same transaction as the change, drained by app/outbox.py
+class OutboxEvent(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String, nullable=False)  # e.g. transaction.created
+    aggregate_type = Column(String, nullable=False)  # e.g. transaction, investment
+    aggregate_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
@@ -0,0 +1,204 @@
+"""
+Transactional outbox for trade events and the background dispatcher that publishes them
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DISPATCHER_ENABLED = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"
+OUTBOX_SINK = os.getenv("OUTBOX_SINK", "log")  # log, memory or file:<path>
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_BASE_BACKOFF = float(os.getenv("OUTBOX_BASE_BACKOFF", "1"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "300"))
+
+def enqueue(
+    db: Session,
+    event_type: str,
+    aggregate_type: str,
+    aggregate_id: int,
+    user_id: int,
+    payload: dict
+):
+    """Add an event to the caller's transaction; it is only visible to the dispatcher once committed."""
+    db.add(models.OutboxEvent(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        user_id=user_id,
+        payload=payload,
+        attempts=0
+    ))
+
+def enqueue_transaction_created(db: Session, transaction: models.Transaction, investment: models.Investment):
+    """transaction.created for a flushed transaction, with the position it left behind"""
+    enqueue(db, "transaction.created", "transaction", transaction.id, transaction.user_id, {
+        "transaction_id": transaction.id,
+        "investment_id": investment.id,
+        "symbol": investment.symbol,
+        "transaction_type": transaction.transaction_type.value,
+        "quantity": transaction.quantity,
+        "price_per_unit": transaction.price_per_unit,
+        "total_amount": transaction.total_amount,
+        "position_quantity": investment.quantity
+    })
+
+def enqueue_transaction_deleted(db: Session, user_id: int, transaction_id: int, investment_id: int):
+    enqueue(db, "transaction.deleted", "transaction", transaction_id, user_id, {
+        "transaction_id": transaction_id,
+        "investment_id": investment_id
+    })
+
+class EventSink:
+    def publish(self, events: List[dict]):
+        raise NotImplementedError
+
+class LoggingSink(EventSink):
+    def publish(self, events: List[dict]):
+        for event in events:
+            logger.info("outbox event %s", json.dumps(event))
+
+class QueueSink(EventSink):
+    """In-process queue, for tests and in-process consumers"""
+
+    def __init__(self, events_queue: Optional[queue.Queue] = None):
+        self.queue = events_queue if events_queue is not None else queue.Queue()
+
+    def publish(self, events: List[dict]):
+        for event in events:
+            self.queue.put(event)
+
+class FileSink(EventSink):
+    """Appends events as JSON lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def publish(self, events: List[dict]):
+        lines = "".join(json.dumps(event) + "\n" for event in events)
+        with self._lock, open(self.path, "a") as output:
+            output.write(lines)
+
+def build_sink(spec: str) -> EventSink:
+    if spec == "log":
+        return LoggingSink()
+    if spec == "memory":
+        return QueueSink()
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+    raise ValueError(f"Unknown outbox sink: {spec}")
+
+def _serialize(event: models.OutboxEvent) -> dict:
+    return {
+        "id": event.id,
+        "event_type": event.event_type,
+        "aggregate_type": event.aggregate_type,
+        "aggregate_id": event.aggregate_id,
+        "user_id": event.user_id,
+        "payload": event.payload,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+class OutboxDispatcher:
+    """
+    Drains the outbox in batches on a background thread. Rows are claimed with
+    FOR UPDATE SKIP LOCKED so several workers can run side by side, and deleted once
+    every sink accepted the batch. A failed batch is retried with exponential backoff
+    until OUTBOX_MAX_ATTEMPTS; rows past that stay in the table with their last error.
+    Delivery is at-least-once, so consumers should dedupe on the event id.
+    """
+
+    def __init__(
+        self,
+        sinks: List[EventSink],
+        session_factory=SessionLocal,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS
+    ):
+        self.sinks = sinks
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(OUTBOX_BASE_BACKOFF * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF))
+
+    def run_once(self) -> int:
+        """Publish one batch. Returns the number of events published."""
+        db = self.session_factory()
+        try:
+            events = db.query(models.OutboxEvent).filter(
+                models.OutboxEvent.available_at <= func.now(),
+                models.OutboxEvent.attempts < self.max_attempts
+            ).order_by(models.OutboxEvent.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+            if not events:
+                db.rollback()
+                return 0
+
+            try:
+                batch = [_serialize(event) for event in events]
+                for sink in self.sinks:
+                    sink.publish(batch)
+            except Exception as e:
+                now = datetime.now(timezone.utc)
+                for event in events:
+                    event.attempts += 1
+                    event.available_at = now + self.backoff(event.attempts)
+                    event.last_error = str(e)[:500]
+                db.commit()
+                logger.warning("Publishing %d outbox events failed: %s", len(events), e)
+                return 0
+
+            db.query(models.OutboxEvent).filter(
+                models.OutboxEvent.id.in_([event.id for event in events])
+            ).delete(synchronize_session=False)
+            db.commit()
+            return len(events)
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                published = self.run_once()
+            except Exception:
+                logger.exception("Outbox dispatcher iteration failed")
+                published = 0
+            # Keep draining while batches come back full
+            if published < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+dispatcher = OutboxDispatcher([build_sink(OUTBOX_SINK)])
@@ -0,0 +1,176 @@
+"""
+Monthly range partitions for the transactions table and archival of cold history
+"""
+
+import re
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app import models
+
+PARENT_TABLE = "transactions"
+DEFAULT_PARTITION = "transactions_default"
+ARCHIVE_TABLE = "transactions_archive"
+UNPARTITIONED_TABLE = "transactions_unpartitioned"
+PARTITION_NAME = re.compile(r"^transactions_p(\d{4})(\d{2})$")
+COLUMNS = (
+    "id, user_id, investment_id, transaction_type, quantity, "
+    "price_per_unit, total_amount, transaction_date, notes"
+)
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+def _bound(month: date) -> str:
+    # Bounds are generated from dates, never from user input
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+def list_partitions(conn: Connection) -> Dict[str, date]:
+    """Monthly partitions currently attached to transactions, keyed by name"""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": PARENT_TABLE}).scalars()
+
+    partitions = {}
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+def create_partition(conn: Connection, month: date):
+    """
+    Create and attach the partition for one month. Rows for that month that already
+    landed in the default partition are moved into it first, otherwise ATTACH fails.
+    """
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    conn.exec_driver_sql(
+        f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    conn.exec_driver_sql(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE transaction_date >= {start} AND transaction_date < {end} "
+        f"RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved"
+    )
+    conn.exec_driver_sql(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})"
+    )
+
+def archive_partition(conn: Connection, name: str) -> int:
+    """Copy a partition into the archive table, then detach and drop it"""
+    archived = conn.exec_driver_sql(
+        f"INSERT INTO {ARCHIVE_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {name}"
+    ).rowcount
+    conn.exec_driver_sql(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+    conn.exec_driver_sql(f"DROP TABLE {name}")
+    return archived
+
+def maintain_partitions(
+    engine: Engine,
+    months_ahead: int = 3,
+    retain_months: int = 24,
+    today: Optional[date] = None
+) -> dict:
+    """
+    Ensure partitions exist from the current month through ``months_ahead`` months
+    ahead and for any month found in the default partition, then archive partitions
+    that ended more than ``retain_months`` months ago. Each partition is handled in
+    its own transaction.
+    """
+    current_month = month_start(today or date.today())
+    archive_before = add_months(current_month, -retain_months)
+    summary = {"created": [], "archived": {}}
+
+    with engine.connect() as conn:
+        existing = list_partitions(conn)
+        # Months that fell into the default partition get their own partition too,
+        # which keeps the default partition empty and prunable
+        stray_months = conn.exec_driver_sql(
+            f"SELECT DISTINCT date_trunc('month', transaction_date AT TIME ZONE 'UTC')::date "
+            f"FROM {DEFAULT_PARTITION}"
+        ).scalars().all()
+
+    wanted = set(stray_months)
+    wanted.update(add_months(current_month, offset) for offset in range(months_ahead + 1))
+    for month in sorted(wanted):
+        name = partition_name(month)
+        if name not in existing:
+            with engine.begin() as conn:
+                create_partition(conn, month)
+            existing[name] = month
+            summary["created"].append(name)
+
+    for name, month in sorted(existing.items(), key=lambda item: item[1]):
+        if add_months(month, 1) <= archive_before:
+            with engine.begin() as conn:
+                summary["archived"][name] = archive_partition(conn, name)
+
+    return summary
+
+def is_partitioned(conn: Connection) -> Optional[bool]:
+    """Whether transactions is a partitioned table; None when it does not exist yet"""
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": PARENT_TABLE}
+    ).scalar()
+    return None if relkind is None else relkind == "p"
+
+def convert_to_partitioned(engine: Engine) -> Optional[int]:
+    """
+    Replace a plain transactions table (created before partitioning) with the partitioned
+    one, in a single transaction that blocks writers until it commits. Every row goes
+    into the default partition; maintain_partitions() then moves each month into its own
+    partition. Returns the number of rows copied, or None if there was nothing to convert.
+    """
+    with engine.begin() as conn:
+        if is_partitioned(conn) is not False:
+            return None
+
+        conn.exec_driver_sql(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE")
+        conn.exec_driver_sql(f"ALTER TABLE {PARENT_TABLE} RENAME TO {UNPARTITIONED_TABLE}")
+        # Free the index and sequence names (transactions_pkey, transactions_id_seq, ...)
+        # for the new table
+        indexes = conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :name"),
+            {"name": UNPARTITIONED_TABLE}
+        ).scalars().all()
+        for index in indexes:
+            conn.exec_driver_sql(f"ALTER INDEX {index} RENAME TO {index}_unpartitioned")
+        sequence = conn.execute(
+            text("SELECT pg_get_serial_sequence(:name, 'id')"),
+            {"name": UNPARTITIONED_TABLE}
+        ).scalar()
+        if sequence:
+            conn.exec_driver_sql(f"ALTER SEQUENCE {sequence} RENAME TO {UNPARTITIONED_TABLE}_id_seq")
+
+        # Also creates the default partition; the enum type already exists
+        models.Transaction.__table__.create(conn, checkfirst=True)
+        # transaction_date is part of the new primary key; rows from before it was
+        # required are dated now
+        copied = conn.exec_driver_sql(
+            f"INSERT INTO {PARENT_TABLE} ({COLUMNS}) "
+            f"SELECT {COLUMNS.replace('transaction_date', 'COALESCE(transaction_date, now())')} "
+            f"FROM {UNPARTITIONED_TABLE}"
+        ).rowcount
+        conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{PARENT_TABLE}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {PARENT_TABLE}"
+        )
+        conn.exec_driver_sql(f"DROP TABLE {UNPARTITIONED_TABLE}")
+    return copied
@@ -0,0 +1,209 @@
+"""
+Opt-in request profiling and slow-query log, kept in bounded in-memory ring buffers
+"""
+
+import asyncio
+import cProfile
+import functools
+import io
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app import auth
+from app.database import engine, replica_engines
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "30"))
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+PROFILE_HEADER = "X-Profile"
+MAX_QUERIES_PER_PROFILE = 200
+MAX_PARAMETERS_LENGTH = 500
+EXPLAINABLE_STATEMENTS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+# Bind parameters whose values never go into the slow-query log
+SENSITIVE_PARAMETERS = {"hashed_password", "password"}
+REDACTED = "[REDACTED]"
+
+class RingBuffer:
+    def __init__(self, size: int):
+        self._items = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, item: dict):
+        with self._lock:
+            self._items.append(item)
+
+    def snapshot(self) -> list:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._items))
+
+profiles = RingBuffer(PROFILE_BUFFER_SIZE)
+slow_queries = RingBuffer(SLOW_QUERY_BUFFER_SIZE)
+_profile_ids = itertools.count(1)
+_current_profile: ContextVar[Optional[dict]] = ContextVar("current_profile", default=None)
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _format_stats(profiler: cProfile.Profile) -> str:
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    return output.getvalue()
+
+def _profiled(endpoint):
+    """Run the endpoint under cProfile when the current request is being profiled"""
+    # include_router rebuilds routes with the same route class; wrap only once
+    if getattr(endpoint, "__profiled__", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            record = _current_profile.get()
+            if record is None:
+                return await endpoint(*args, **kwargs)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profiler.disable()
+                record["profile"] = _format_stats(profiler)
+        async_wrapper.__profiled__ = True
+        return async_wrapper
+
+    # Sync endpoints run in the threadpool; cProfile is enabled in that worker thread
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        record = _current_profile.get()
+        if record is None:
+            return endpoint(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profiler.disable()
+            record["profile"] = _format_stats(profiler)
+    wrapper.__profiled__ = True
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+def _should_profile(request: Request) -> bool:
+    if request.headers.get(PROFILE_HEADER) == "1":
+        return auth.get_request_subject(request) in auth.ADMIN_USERNAMES
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if not _should_profile(request):
+            return await call_next(request)
+
+        record = {
+            "id": next(_profile_ids),
+            "method": request.method,
+            "path": request.url.path,
+            "started_at": _now(),
+            "duration_ms": None,
+            "status_code": None,
+            "queries": [],
+            "profile": None,
+        }
+        token = _current_profile.set(record)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+            record["status_code"] = response.status_code
+            response.headers["X-Profile-Id"] = str(record["id"])
+            return response
+        finally:
+            record["duration_ms"] = (time.perf_counter() - started) * 1000
+            _current_profile.reset(token)
+            profiles.append(record)
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """
+    EXPLAIN (without ANALYZE, so nothing is executed again) on the same connection.
+    Wrapped in a savepoint so a failing EXPLAIN cannot abort the caller's transaction.
+    """
+    if conn.dialect.name != "postgresql":
+        return None
+    if not statement.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+        return None
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute("EXPLAIN " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            plan = f"EXPLAIN failed: {e}"
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+
+def _is_sensitive(name) -> bool:
+    # Multi-row INSERTs suffix the names per row (hashed_password_m0, ...)
+    return isinstance(name, str) and any(
+        name == key or name.startswith(key + "_m") for key in SENSITIVE_PARAMETERS
+    )
+
+def _redact(parameters):
+    """Copy of the bind parameters with sensitive values masked; lists are executemany batches"""
+    if isinstance(parameters, dict):
+        return {name: REDACTED if _is_sensitive(name) else value for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return type(parameters)(_redact(item) for item in parameters)
+    return parameters
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # One slot per connection; a statement that fails simply gets overwritten by the next one
+    conn.info["query_started_at"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info.pop("query_started_at", None)
+    if started_at is None:
+        return
+    duration_ms = (time.perf_counter() - started_at) * 1000
+
+    record = _current_profile.get()
+    if record is not None and len(record["queries"]) < MAX_QUERIES_PER_PROFILE:
+        record["queries"].append({"statement": statement, "duration_ms": duration_ms})
+
+    if duration_ms >= SLOW_QUERY_THRESHOLD_MS:
+        slow_queries.append({
+            "recorded_at": _now(),
+            "statement": statement,
+            "parameters": repr(_redact(parameters))[:MAX_PARAMETERS_LENGTH],
+            "duration_ms": duration_ms,
+            "executemany": executemany,
+            "plan": None if executemany else _explain(conn, statement, parameters),
+            "profile_id": record["id"] if record is not None else None,
+        })
+
+for _engine in [engine, *replica_engines]:
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
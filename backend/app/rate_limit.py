@@ -0,0 +1,189 @@
+"""
+Request rate limiting with token buckets and per-user concurrency caps
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app import auth
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+USER_MAX_CONCURRENT_REQUESTS = int(os.getenv("USER_MAX_CONCURRENT_REQUESTS", "10"))
+
+@dataclass(frozen=True)
+class RouteLimit:
+    capacity: float      # burst size in requests
+    refill_rate: float   # sustained requests per second
+    scope: str = "user"  # "user" keys on the JWT subject (IP for anonymous calls), "ip" always keys on the client
+
+# Every request draws from the per-IP bucket, then from its route bucket (or the default one)
+IP_LIMIT = RouteLimit(
+    capacity=float(os.getenv("RATE_LIMIT_IP_BURST", "120")),
+    refill_rate=float(os.getenv("RATE_LIMIT_IP_PER_SECOND", "20")),
+    scope="ip",
+)
+DEFAULT_LIMIT = RouteLimit(
+    capacity=float(os.getenv("RATE_LIMIT_BURST", "60")),
+    refill_rate=float(os.getenv("RATE_LIMIT_PER_SECOND", "10")),
+)
+ROUTE_LIMITS: Dict[str, RouteLimit] = {
+    # Each login attempt costs a bcrypt verify
+    "/auth/login": RouteLimit(capacity=5, refill_rate=5 / 60, scope="ip"),
+    "/auth/token": RouteLimit(capacity=5, refill_rate=5 / 60, scope="ip"),
+    "/auth/register": RouteLimit(capacity=5, refill_rate=5 / 60, scope="ip"),
+    "/portfolio/summary": RouteLimit(capacity=10, refill_rate=1),
+}
+EXEMPT_PATHS = {"/", "/health", "/docs", "/redoc", "/openapi.json"}
+
+def parse_route_limits(raw: str) -> Dict[str, RouteLimit]:
+    """
+    Route overrides from RATE_LIMIT_ROUTES, a JSON object mapping paths to limits, e.g.
+    {"/portfolio/summary": {"capacity": 20, "refill_rate": 2, "scope": "user"}}
+    """
+    if not raw.strip():
+        return {}
+    return {
+        path.rstrip("/") or "/": RouteLimit(
+            capacity=float(spec["capacity"]),
+            refill_rate=float(spec["refill_rate"]),
+            scope=spec.get("scope", "user"),
+        )
+        for path, spec in json.loads(raw).items()
+    }
+
+ROUTE_LIMITS.update(parse_route_limits(os.getenv("RATE_LIMIT_ROUTES", "")))
+
+class TokenBucketStore:
+    """
+    Fixed-size LRU of token buckets. Buckets are refilled lazily when they are
+    touched, so there is no background sweeper; an evicted bucket would have
+    been full anyway once idle for capacity / refill_rate seconds.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RouteLimit, now: Optional[float] = None) -> float:
+        """Consume one token. Returns 0 when allowed, otherwise seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / limit.refill_rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+class ConcurrencyLimiter:
+    """Counts in-flight requests per key; keys are dropped as soon as their count reaches zero."""
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> bool:
+        with self._lock:
+            count = self._in_flight.get(key, 0)
+            if count >= self.max_concurrent:
+                return False
+            self._in_flight[key] = count + 1
+            return True
+
+    def release(self, key: str):
+        with self._lock:
+            count = self._in_flight.get(key, 0) - 1
+            if count > 0:
+                self._in_flight[key] = count
+            else:
+                self._in_flight.pop(key, None)
+
+class RateLimitMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited: Dict[str, int] = {}
+
+    def record_allowed(self):
+        with self._lock:
+            self.allowed += 1
+
+    def record_limited(self, reason: str):
+        with self._lock:
+            self.limited[reason] = self.limited.get(reason, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "limited": dict(self.limited),
+                "limited_total": sum(self.limited.values()),
+            }
+
+bucket_store = TokenBucketStore(RATE_LIMIT_MAX_KEYS)
+concurrency_limiter = ConcurrencyLimiter(USER_MAX_CONCURRENT_REQUESTS)
+metrics = RateLimitMetrics()
+
+def _too_many_requests(retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests"},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path.rstrip("/") or "/"
+        if not RATE_LIMIT_ENABLED or request.method == "OPTIONS" or path in EXEMPT_PATHS:
+            return await call_next(request)
+
+        client_ip = request.client.host if request.client else "unknown"
+        subject = auth.get_request_subject(request)
+
+        retry_after = bucket_store.take(f"ip:{client_ip}", IP_LIMIT)
+        if retry_after:
+            metrics.record_limited("ip")
+            return _too_many_requests(retry_after)
+
+        limit = ROUTE_LIMITS.get(path, DEFAULT_LIMIT)
+        route_key = path if path in ROUTE_LIMITS else "*"
+        if limit.scope == "user" and subject is not None:
+            limit_key = f"user:{subject}:{route_key}"
+        else:
+            limit_key = f"ip:{client_ip}:{route_key}"
+        retry_after = bucket_store.take(limit_key, limit)
+        if retry_after:
+            metrics.record_limited(f"route:{route_key}")
+            return _too_many_requests(retry_after)
+
+        if subject is None:
+            metrics.record_allowed()
+            return await call_next(request)
+
+        concurrency_key = f"user:{subject}"
+        if not concurrency_limiter.acquire(concurrency_key):
+            metrics.record_limited("concurrency")
+            return _too_many_requests(1)
+        try:
+            metrics.record_allowed()
+            return await call_next(request)
+        finally:
+            concurrency_limiter.release(concurrency_key)
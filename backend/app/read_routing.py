@@ -0,0 +1,82 @@
+"""
+Routing of read-only handlers to replica databases with read-your-writes stickiness
+"""
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app import auth, models
+from app.database import engine, SessionLocal, ReplicaSessionLocal, replica_pool, recent_writers
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def get_read_db(request: Request):
+    """
+    Session for read-only handlers. Uses the next healthy replica, or the primary when
+    there is none or the caller wrote recently and the replica may not have caught up.
+    """
+    subject = auth.get_request_subject(request)
+    replica = None
+    if subject is None or not recent_writers.is_recent(subject):
+        replica = replica_pool.choose()
+
+    db = None
+    if replica is not None:
+        db = ReplicaSessionLocal(bind=replica)
+        try:
+            # Connect up front so an unreachable replica falls back instead of failing the request
+            db.connection()
+        except OperationalError:
+            db.close()
+            replica_pool.mark_unhealthy(replica)
+            db = None
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_current_read_user(
+    credentials: HTTPAuthorizationCredentials = Depends(auth.security),
+    db: Session = Depends(get_read_db)
+):
+    """
+    auth.get_current_user for read-only handlers: looks the user up on the handler's
+    read session, so a replica-routed request does not also hold a primary connection.
+    """
+    try:
+        return auth.get_current_user(credentials, db)
+    except HTTPException:
+        if db.get_bind() is engine or auth.get_token_subject(credentials.credentials) is None:
+            raise
+    # A valid token whose user is missing on the replica: the account may be newer than
+    # the replica's position, so ask the primary before rejecting
+    primary = SessionLocal()
+    try:
+        return auth.get_current_user(credentials, primary)
+    finally:
+        primary.close()
+
+def get_current_read_admin_user(current_user: models.User = Depends(get_current_read_user)):
+    """auth.get_current_admin_user for read-only handlers, authenticated on the read session"""
+    return auth.get_current_admin_user(current_user)
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        subject = None
+        if request.method not in SAFE_METHODS:
+            subject = auth.get_request_subject(request)
+        if subject is None:
+            return await call_next(request)
+
+        # Marked before and after so the window covers the whole write and starts again
+        # once it has committed
+        recent_writers.mark(subject)
+        try:
+            return await call_next(request)
+        finally:
+            recent_writers.mark(subject)
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List
+from app.database import get_db
+from app import models, schemas, auth, profiling, rate_limit
+
+router = APIRouter(route_class=profiling.ProfiledRoute)
+
+def _exposure_query(db: Session):
+    return db.query(
+        models.SymbolExposure.symbol,
+        func.sum(models.SymbolExposure.total_quantity).label("total_quantity"),
+        func.sum(models.SymbolExposure.market_value).label("market_value"),
+        func.sum(models.SymbolExposure.holder_count).label("holder_count")
+    ).group_by(models.SymbolExposure.symbol)
+
+@router.get("/exposure", response_model=List[schemas.SymbolExposureResponse])
+def get_symbol_exposures(
+    limit: int = Query(50, ge=1, le=1000),
+    admin_user: models.User = Depends(auth.get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    rows = _exposure_query(db).having(
+        func.sum(models.SymbolExposure.holder_count) > 0
+    ).order_by(
+        func.sum(models.SymbolExposure.market_value).desc()
+    ).limit(limit).all()
+    
+    return [
+        schemas.SymbolExposureResponse(
+            symbol=row.symbol,
+            total_quantity=row.total_quantity,
+            market_value=row.market_value,
+            holder_count=row.holder_count
+        )
+        for row in rows
+    ]
+
+@router.get("/exposure/{symbol}", response_model=schemas.SymbolExposureDetail)
+def get_symbol_exposure(
+    symbol: str,
+    top: int = Query(10, ge=1, le=100),
+    admin_user: models.User = Depends(auth.get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    symbol = symbol.upper()
+    totals = _exposure_query(db).filter(models.SymbolExposure.symbol == symbol).first()
+    
+    if not totals or not totals.holder_count:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No holders for this symbol"
+        )
+    
+    # Served by the (symbol, quantity) index
+    holders = db.query(
+        models.Investment.user_id,
+        models.User.username,
+        models.Investment.quantity,
+        models.Investment.current_price
+    ).join(
+        models.User, models.User.id == models.Investment.user_id
+    ).filter(
+        models.Investment.symbol == symbol,
+        models.Investment.quantity > 0
+    ).order_by(models.Investment.quantity.desc()).limit(top).all()
+    
+    return schemas.SymbolExposureDetail(
+        symbol=totals.symbol,
+        total_quantity=totals.total_quantity,
+        market_value=totals.market_value,
+        holder_count=totals.holder_count,
+        top_holders=[
+            schemas.ExposureHolder(
+                user_id=holder.user_id,
+                username=holder.username,
+                quantity=holder.quantity,
+                market_value=holder.quantity * holder.current_price
+            )
+            for holder in holders
+        ]
+    )
+
+@router.get("/profiles", response_model=List[schemas.RequestProfile])
+def get_request_profiles(
+    limit: int = Query(20, ge=1, le=1000),
+    admin_user: models.User = Depends(auth.get_current_admin_user)
+):
+    return profiling.profiles.snapshot()[:limit]
+
+@router.get("/profiles/{profile_id}", response_model=schemas.RequestProfile)
+def get_request_profile(
+    profile_id: int,
+    admin_user: models.User = Depends(auth.get_current_admin_user)
+):
+    for record in profiling.profiles.snapshot():
+        if record["id"] == profile_id:
+            return record
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Profile not found"
+    )
+
+@router.get("/slow-queries", response_model=List[schemas.SlowQuery])
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    admin_user: models.User = Depends(auth.get_current_admin_user)
+):
+    return profiling.slow_queries.snapshot()[:limit]
+
+@router.get("/rate-limit")
+def get_rate_limit_metrics(admin_user: models.User = Depends(auth.get_current_admin_user)):
+    return rate_limit.metrics.snapshot()
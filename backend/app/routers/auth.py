@@ -3,9 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas, auth
+from app import models, schemas, auth, profiling
 
-router = APIRouter()
+router = APIRouter(route_class=profiling.ProfiledRoute)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 @router.post("/register", response_model=schemas.UserResponse)
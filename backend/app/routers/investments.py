@@ -1,46 +1,73 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app import models, schemas, auth
+from app.read_routing import get_read_db, get_current_read_user
+from app import models, schemas, auth, exposure, outbox, profiling, transaction_counts
 
-router = APIRouter()
+router = APIRouter(route_class=profiling.ProfiledRoute)
+
+MAX_BATCH_SIZE = 1000
+
+def _enqueue_investment_updated(db: Session, investment: models.Investment, changes: dict):
+    outbox.enqueue(db, "investment.updated", "investment", investment.id, investment.user_id, {
+        "investment_id": investment.id,
+        "symbol": investment.symbol,
+        "changes": changes
+    })
+
+def _investment_response(investment: models.Investment) -> schemas.InvestmentResponse:
+    current_value = investment.quantity * investment.current_price
+    total_invested = investment.quantity * investment.average_purchase_price
+    total_gain_loss = current_value - total_invested
+    gain_loss_percentage = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
+    
+    return schemas.InvestmentResponse(
+        id=investment.id,
+        user_id=investment.user_id,
+        symbol=investment.symbol,
+        name=investment.name,
+        asset_type=investment.asset_type,
+        quantity=investment.quantity,
+        average_purchase_price=investment.average_purchase_price,
+        current_price=investment.current_price,
+        created_at=investment.created_at,
+        updated_at=investment.updated_at,
+        current_value=current_value,
+        total_gain_loss=total_gain_loss,
+        gain_loss_percentage=gain_loss_percentage
+    )
+
+def _validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+    )
+
+def _check_batch_size(items: list):
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch must contain at least one item"
+        )
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch cannot contain more than {MAX_BATCH_SIZE} items"
+        )
 
 @router.get("/", response_model=List[schemas.InvestmentResponse])
 def get_user_investments(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     investments = db.query(models.Investment).filter(
         models.Investment.user_id == current_user.id
     ).all()
     
     # Calculate additional fields for each investment
-    investment_responses = []
-    for investment in investments:
-        current_value = investment.quantity * investment.current_price
-        total_invested = investment.quantity * investment.average_purchase_price
-        total_gain_loss = current_value - total_invested
-        gain_loss_percentage = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
-        
-        investment_data = schemas.InvestmentResponse(
-            id=investment.id,
-            user_id=investment.user_id,
-            symbol=investment.symbol,
-            name=investment.name,
-            asset_type=investment.asset_type,
-            quantity=investment.quantity,
-            average_purchase_price=investment.average_purchase_price,
-            current_price=investment.current_price,
-            created_at=investment.created_at,
-            updated_at=investment.updated_at,
-            current_value=current_value,
-            total_gain_loss=total_gain_loss,
-            gain_loss_percentage=gain_loss_percentage
-        )
-        investment_responses.append(investment_data)
-    
-    return investment_responses
+    return [_investment_response(investment) for investment in investments]
 
 @router.post("/", response_model=schemas.InvestmentResponse)
 def create_investment(
@@ -71,6 +98,7 @@ def create_investment(
     )
     
     db.add(db_investment)
+    exposure.record_position_change(db, current_user.id, None, exposure.snapshot(db_investment))
     db.commit()
     db.refresh(db_investment)
     
@@ -85,29 +113,181 @@ def create_investment(
     )
     
     db.add(transaction)
+    transaction_counts.record_count(db, current_user.id, db_investment.id, 1)
+    # Assigns the transaction id for the event, which commits with the transaction
+    db.flush()
+    outbox.enqueue_transaction_created(db, transaction, db_investment)
     db.commit()
     
-    # Calculate response fields
-    current_value = db_investment.quantity * db_investment.current_price
-    total_invested = db_investment.quantity * db_investment.average_purchase_price
-    total_gain_loss = current_value - total_invested
-    gain_loss_percentage = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
+    return _investment_response(db_investment)
+
+@router.post("/batch", response_model=List[schemas.InvestmentBatchResult])
+def create_investments_batch(
+    investments: List[schemas.InvestmentBatchCreate],
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    _check_batch_size(investments)
     
-    return schemas.InvestmentResponse(
-        id=db_investment.id,
-        user_id=db_investment.user_id,
-        symbol=db_investment.symbol,
-        name=db_investment.name,
-        asset_type=db_investment.asset_type,
-        quantity=db_investment.quantity,
-        average_purchase_price=db_investment.average_purchase_price,
-        current_price=db_investment.current_price,
-        created_at=db_investment.created_at,
-        updated_at=db_investment.updated_at,
-        current_value=current_value,
-        total_gain_loss=total_gain_loss,
-        gain_loss_percentage=gain_loss_percentage
-    )
+    # One IN query for every symbol in the batch instead of one lookup per item
+    symbols = {investment.symbol.upper() for investment in investments}
+    taken_symbols = {
+        symbol for (symbol,) in db.query(models.Investment.symbol).filter(
+            models.Investment.user_id == current_user.id,
+            models.Investment.symbol.in_(symbols)
+        )
+    }
+    
+    results: List[schemas.InvestmentBatchResult] = [None] * len(investments)
+    pending = []
+    for index, item in enumerate(investments):
+        try:
+            investment = schemas.InvestmentCreate(**item.dict())
+        except ValidationError as e:
+            results[index] = schemas.InvestmentBatchResult(
+                index=index,
+                status="error",
+                error=_validation_error(e)
+            )
+            continue
+        symbol = investment.symbol.upper()
+        if symbol in taken_symbols:
+            results[index] = schemas.InvestmentBatchResult(
+                index=index,
+                status="error",
+                error="Investment with this symbol already exists"
+            )
+            continue
+        taken_symbols.add(symbol)
+        pending.append((index, symbol, investment))
+    
+    if pending:
+        # Bulk INSERT ... RETURNING, rows come back in parameter order
+        db_investments = db.scalars(
+            insert(models.Investment).returning(models.Investment, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": current_user.id,
+                    "symbol": symbol,
+                    "name": investment.name,
+                    "asset_type": investment.asset_type,
+                    "quantity": investment.quantity,
+                    "average_purchase_price": investment.purchase_price,
+                    "current_price": investment.purchase_price  # Initially set to purchase price
+                }
+                for _, symbol, investment in pending
+            ]
+        ).all()
+        
+        # Initial buy transactions for every created investment
+        db_transactions = db.scalars(
+            insert(models.Transaction).returning(models.Transaction, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": current_user.id,
+                    "investment_id": db_investment.id,
+                    "transaction_type": models.TransactionType.BUY,
+                    "quantity": investment.quantity,
+                    "price_per_unit": investment.purchase_price,
+                    "total_amount": investment.quantity * investment.purchase_price
+                }
+                for (_, _, investment), db_investment in zip(pending, db_investments)
+            ]
+        ).all()
+        for db_transaction, db_investment in zip(db_transactions, db_investments):
+            outbox.enqueue_transaction_created(db, db_transaction, db_investment)
+        
+        exposure.record_position_changes(
+            db,
+            current_user.id,
+            [(None, exposure.snapshot(db_investment)) for db_investment in db_investments]
+        )
+        transaction_counts.record_counts(
+            db,
+            current_user.id,
+            {db_investment.id: 1 for db_investment in db_investments}
+        )
+        
+        for (index, _, _), db_investment in zip(pending, db_investments):
+            results[index] = schemas.InvestmentBatchResult(
+                index=index,
+                status="created",
+                investment=_investment_response(db_investment)
+            )
+        
+        db.commit()
+    
+    return results
+
+@router.patch("/batch", response_model=List[schemas.InvestmentBatchResult])
+def update_investments_batch(
+    investment_updates: List[schemas.InvestmentBatchUpdate],
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    _check_batch_size(investment_updates)
+    
+    ids = {item.id for item in investment_updates}
+    # Locked in id order before the "before" snapshots, so concurrent writers take the
+    # investment and then the symbol_exposure locks in the same order as trades do
+    investments_by_id = {
+        investment.id: investment for investment in db.query(models.Investment).filter(
+            models.Investment.id.in_(ids),
+            models.Investment.user_id == current_user.id
+        ).order_by(models.Investment.id).with_for_update()
+    }
+    
+    results: List[schemas.InvestmentBatchResult] = [None] * len(investment_updates)
+    updated = []
+    position_changes = []
+    for index, item in enumerate(investment_updates):
+        investment = investments_by_id.get(item.id)
+        if investment is None:
+            results[index] = schemas.InvestmentBatchResult(
+                index=index,
+                status="error",
+                error="Investment not found"
+            )
+            continue
+        try:
+            investment_update = schemas.InvestmentUpdate(**item.dict(exclude_unset=True, exclude={"id"}))
+        except ValidationError as e:
+            results[index] = schemas.InvestmentBatchResult(
+                index=index,
+                status="error",
+                error=_validation_error(e)
+            )
+            continue
+        
+        # Update fields that are provided
+        before = exposure.snapshot(investment)
+        update_data = investment_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            if field == "symbol" and value:
+                value = value.upper()
+            setattr(investment, field, value)
+        position_changes.append((before, exposure.snapshot(investment)))
+        _enqueue_investment_updated(db, investment, update_data)
+        updated.append((index, investment))
+    
+    if updated:
+        exposure.record_position_changes(db, current_user.id, position_changes)
+        db.flush()
+        # Reload server-generated columns (updated_at) for all rows in one query
+        db.query(models.Investment).filter(
+            models.Investment.id.in_({investment.id for _, investment in updated})
+        ).populate_existing().all()
+        
+        for index, investment in updated:
+            results[index] = schemas.InvestmentBatchResult(
+                index=index,
+                status="updated",
+                investment=_investment_response(investment)
+            )
+        
+        db.commit()
+    
+    return results
 
 @router.get("/{investment_id}", response_model=schemas.InvestmentResponse)
 def get_investment(
@@ -126,27 +306,7 @@ def get_investment(
             detail="Investment not found"
         )
     
-    # Calculate additional fields
-    current_value = investment.quantity * investment.current_price
-    total_invested = investment.quantity * investment.average_purchase_price
-    total_gain_loss = current_value - total_invested
-    gain_loss_percentage = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
-    
-    return schemas.InvestmentResponse(
-        id=investment.id,
-        user_id=investment.user_id,
-        symbol=investment.symbol,
-        name=investment.name,
-        asset_type=investment.asset_type,
-        quantity=investment.quantity,
-        average_purchase_price=investment.average_purchase_price,
-        current_price=investment.current_price,
-        created_at=investment.created_at,
-        updated_at=investment.updated_at,
-        current_value=current_value,
-        total_gain_loss=total_gain_loss,
-        gain_loss_percentage=gain_loss_percentage
-    )
+    return _investment_response(investment)
 
 @router.put("/{investment_id}", response_model=schemas.InvestmentResponse)
 def update_investment(
@@ -155,10 +315,12 @@ def update_investment(
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
+    # Locked like in create_transaction: keeps the exposure snapshot current and the
+    # lock order (investment, then symbol_exposure) the same for every writer
     investment = db.query(models.Investment).filter(
         models.Investment.id == investment_id,
         models.Investment.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if not investment:
         raise HTTPException(
@@ -167,36 +329,19 @@ def update_investment(
         )
     
     # Update fields that are provided
+    before = exposure.snapshot(investment)
     update_data = investment_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         if field == "symbol" and value:
             value = value.upper()
         setattr(investment, field, value)
     
+    exposure.record_position_change(db, current_user.id, before, exposure.snapshot(investment))
+    _enqueue_investment_updated(db, investment, update_data)
     db.commit()
     db.refresh(investment)
     
-    # Calculate additional fields
-    current_value = investment.quantity * investment.current_price
-    total_invested = investment.quantity * investment.average_purchase_price
-    total_gain_loss = current_value - total_invested
-    gain_loss_percentage = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
-    
-    return schemas.InvestmentResponse(
-        id=investment.id,
-        user_id=investment.user_id,
-        symbol=investment.symbol,
-        name=investment.name,
-        asset_type=investment.asset_type,
-        quantity=investment.quantity,
-        average_purchase_price=investment.average_purchase_price,
-        current_price=investment.current_price,
-        created_at=investment.created_at,
-        updated_at=investment.updated_at,
-        current_value=current_value,
-        total_gain_loss=total_gain_loss,
-        gain_loss_percentage=gain_loss_percentage
-    )
+    return _investment_response(investment)
 
 @router.delete("/{investment_id}")
 def delete_investment(
@@ -207,7 +352,7 @@ def delete_investment(
     investment = db.query(models.Investment).filter(
         models.Investment.id == investment_id,
         models.Investment.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if not investment:
         raise HTTPException(
@@ -215,12 +360,25 @@ def delete_investment(
             detail="Investment not found"
         )
     
-    # Delete associated transactions first
-    db.query(models.Transaction).filter(
-        models.Transaction.investment_id == investment_id
-    ).delete()
+    # Delete associated transactions first, archived ones included (the archive has no
+    # foreign key to cascade from)
+    deleted_ids = db.scalars(
+        delete(models.Transaction).where(
+            models.Transaction.investment_id == investment_id
+        ).returning(models.Transaction.id)
+    ).all()
+    deleted_ids += db.scalars(
+        delete(models.TransactionArchive).where(
+            models.TransactionArchive.user_id == current_user.id,
+            models.TransactionArchive.investment_id == investment_id
+        ).returning(models.TransactionArchive.id)
+    ).all()
+    for transaction_id in deleted_ids:
+        outbox.enqueue_transaction_deleted(db, current_user.id, transaction_id, investment_id)
     
     # Delete the investment
+    exposure.record_position_change(db, current_user.id, exposure.snapshot(investment), None)
+    transaction_counts.record_count(db, current_user.id, investment_id, -len(deleted_ids))
     db.delete(investment)
     db.commit()
     
@@ -1,15 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from app.database import get_db
-from app import models, schemas, auth
+from typing import Optional
+from app.read_routing import get_read_db, get_current_read_user
+from app import models, schemas, profiling, transaction_counts
 
-router = APIRouter()
+router = APIRouter(route_class=profiling.ProfiledRoute)
 
 @router.get("/summary", response_model=schemas.PortfolioSummary)
 def get_portfolio_summary(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     # Get all investments for the user
     investments = db.query(models.Investment).filter(
@@ -30,9 +31,8 @@ def get_portfolio_summary(
     
     # Count investments and transactions
     investments_count = len(investments)
-    transactions_count = db.query(models.Transaction).filter(
-        models.Transaction.user_id == current_user.id
-    ).count()
+    # Maintained total, a COUNT here would scan every partition and the archive
+    transactions_count = transaction_counts.user_total(db, current_user.id)
     
     return schemas.PortfolioSummary(
         total_value=total_value,
@@ -42,3 +42,54 @@ def get_portfolio_summary(
         investments_count=investments_count,
         transactions_count=transactions_count
     )
+
+@router.get("/allocation", response_model=schemas.PortfolioAllocation)
+def get_portfolio_allocation(
+    top_n: Optional[int] = Query(None, ge=1, le=50, description="Also return the N largest symbols plus an OTHER bucket"),
+    current_user: models.User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
+):
+    # Aggregated in the database so the payload size does not depend on the number of holdings
+    market_value = func.sum(models.Investment.quantity * models.Investment.current_price)
+    rows = db.query(
+        models.Investment.asset_type,
+        func.coalesce(market_value, 0.0),
+        func.count()
+    ).filter(
+        models.Investment.user_id == current_user.id
+    ).group_by(models.Investment.asset_type).all()
+    
+    total_value = sum(value for _, value, _ in rows)
+    holdings_count = sum(count for _, _, count in rows)
+    
+    def to_slice(key: str, value: float, count: int) -> schemas.AllocationSlice:
+        percentage = (value / total_value * 100) if total_value > 0 else 0
+        return schemas.AllocationSlice(key=key, value=value, percentage=percentage, holdings_count=count)
+    
+    by_asset_type = sorted(
+        (to_slice(asset_type.value, value, count) for asset_type, value, count in rows),
+        key=lambda allocation: allocation.value,
+        reverse=True
+    )
+    
+    top_symbols = None
+    if top_n is not None:
+        symbol_value = (models.Investment.quantity * models.Investment.current_price).label("value")
+        symbol_rows = db.query(
+            models.Investment.symbol,
+            symbol_value
+        ).filter(
+            models.Investment.user_id == current_user.id
+        ).order_by(symbol_value.desc()).limit(top_n).all()
+        
+        top_symbols = [to_slice(symbol, value, 1) for symbol, value in symbol_rows]
+        other_count = holdings_count - len(symbol_rows)
+        if other_count > 0:
+            other_value = max(total_value - sum(value for _, value in symbol_rows), 0.0)
+            top_symbols.append(to_slice("OTHER", other_value, other_count))
+    
+    return schemas.PortfolioAllocation(
+        total_value=total_value,
+        by_asset_type=by_asset_type,
+        top_symbols=top_symbols
+    )
@@ -1,21 +1,64 @@
+import os
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import exists, select, union_all
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 from app.database import get_db
-from app import models, schemas, auth
+from app.read_routing import get_read_db, get_current_read_user
+from app import models, schemas, auth, exposure, outbox, profiling, transaction_counts
 
-router = APIRouter()
+router = APIRouter(route_class=profiling.ProfiledRoute)
+
+# Without a start_date the list covers this many days before end_date (or now), so the
+# default query only touches recent partitions
+TRANSACTIONS_DEFAULT_WINDOW_DAYS = int(os.getenv("TRANSACTIONS_DEFAULT_WINDOW_DAYS", "365"))
+
+def _transactions_in_range(model, user_id: int, start_date: Optional[datetime], end_date: Optional[datetime]):
+    """Rows of ``model`` (the partitioned table or the archive) for one user and date range"""
+    query = select(
+        model.id,
+        model.user_id,
+        model.investment_id,
+        model.transaction_type,
+        model.quantity,
+        model.price_per_unit,
+        model.total_amount,
+        model.transaction_date,
+        model.notes
+    ).where(model.user_id == user_id)
+    # Date bounds let Postgres prune monthly partitions outside the range
+    if start_date is not None:
+        query = query.where(model.transaction_date >= start_date)
+    if end_date is not None:
+        query = query.where(model.transaction_date < end_date)
+    return query
 
 @router.get("/", response_model=List[schemas.TransactionResponse])
 def get_user_transactions(
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: models.User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
-    transactions = db.query(models.Transaction).filter(
-        models.Transaction.user_id == current_user.id
-    ).order_by(models.Transaction.transaction_date.desc()).offset(skip).limit(limit).all()
+    if start_date is None:
+        start_date = (end_date or datetime.now(timezone.utc)) - timedelta(days=TRANSACTIONS_DEFAULT_WINDOW_DAYS)
+    
+    query = _transactions_in_range(models.Transaction, current_user.id, start_date, end_date)
+    
+    # History moved out by maintain_partitions.py is only read when the range reaches it
+    archived = _transactions_in_range(models.TransactionArchive, current_user.id, start_date, end_date)
+    if db.query(exists(archived)).scalar():
+        query = union_all(query, archived)
+    
+    transactions = db.execute(
+        query.order_by(
+            query.selected_columns.transaction_date.desc(),
+            query.selected_columns.id.desc()
+        ).offset(skip).limit(limit)
+    ).all()
     
     # Add investment details to each transaction
     transaction_responses = []
@@ -47,11 +90,13 @@ def create_transaction(
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Verify investment exists and belongs to user
+    # Verify investment exists and belongs to user. The row is locked until commit so
+    # concurrent trades on the same investment apply one after another instead of
+    # overwriting each other's position; trades on other investments are unaffected.
     investment = db.query(models.Investment).filter(
         models.Investment.id == transaction.investment_id,
         models.Investment.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if not investment:
         raise HTTPException(
@@ -59,14 +104,18 @@ def create_transaction(
             detail="Investment not found"
         )
     
+    position_before = exposure.snapshot(investment)
+    
     # Calculate total amount
     total_amount = transaction.quantity * transaction.price_per_unit
+    # The request carries the API enum; compare against the model enum
+    transaction_type = models.TransactionType(transaction.transaction_type.value)
     
     # Create transaction
     db_transaction = models.Transaction(
         user_id=current_user.id,
         investment_id=transaction.investment_id,
-        transaction_type=transaction.transaction_type,
+        transaction_type=transaction_type,
         quantity=transaction.quantity,
         price_per_unit=transaction.price_per_unit,
         total_amount=total_amount,
@@ -76,13 +125,13 @@ def create_transaction(
     db.add(db_transaction)
     
     # Update investment based on transaction type
-    if transaction.transaction_type == models.TransactionType.BUY:
+    if transaction_type == models.TransactionType.BUY:
         # Calculate new average price and quantity
         total_cost = (investment.quantity * investment.average_purchase_price) + total_amount
         new_quantity = investment.quantity + transaction.quantity
         investment.average_purchase_price = total_cost / new_quantity if new_quantity > 0 else 0
         investment.quantity = new_quantity
-    elif transaction.transaction_type == models.TransactionType.SELL:
+    elif transaction_type == models.TransactionType.SELL:
         # Check if user has enough shares to sell
         if investment.quantity < transaction.quantity:
             raise HTTPException(
@@ -94,6 +143,12 @@ def create_transaction(
     # Update current price
     investment.current_price = transaction.price_per_unit
     
+    exposure.record_position_change(db, current_user.id, position_before, exposure.snapshot(investment))
+    transaction_counts.record_count(db, current_user.id, investment.id, 1)
+    
+    # Assigns the transaction id for the event; published after commit by the outbox dispatcher
+    db.flush()
+    outbox.enqueue_transaction_created(db, db_transaction, investment)
     db.commit()
     db.refresh(db_transaction)
     
@@ -122,6 +177,13 @@ def get_transaction(
         models.Transaction.user_id == current_user.id
     ).first()
     
+    if not transaction:
+        # Older history lives in the archive once maintain_partitions.py has moved it
+        transaction = db.query(models.TransactionArchive).filter(
+            models.TransactionArchive.id == transaction_id,
+            models.TransactionArchive.user_id == current_user.id
+        ).first()
+    
     if not transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -163,6 +225,8 @@ def delete_transaction(
             detail="Transaction not found"
         )
     
+    outbox.enqueue_transaction_deleted(db, current_user.id, transaction.id, transaction.investment_id)
+    transaction_counts.record_count(db, current_user.id, transaction.investment_id, -1)
     db.delete(transaction)
     db.commit()
     
@@ -1,20 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app import models, schemas, auth
+from app.read_routing import get_read_db, get_current_read_user, get_current_read_admin_user
+from app import models, schemas, auth, profiling
 
-router = APIRouter()
+router = APIRouter(route_class=profiling.ProfiledRoute)
 
 @router.get("/me", response_model=schemas.UserResponse)
 def get_current_user_profile(current_user: models.User = Depends(auth.get_current_user)):
     return current_user
 
 @router.get("/", response_model=List[schemas.UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_read_user)):
     users = db.query(models.User).offset(skip).limit(limit).all()
     return users
 
+def _like_pattern(term: str, match: str) -> str:
+    escaped = term.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if match == "prefix" else f"%{escaped}%"
+
+@router.get("/search", response_model=schemas.UserDirectoryPage)
+def search_users(
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Username or email to look for"),
+    match: str = Query("prefix", pattern="^(prefix|substring)$"),
+    after_id: Optional[int] = Query(None, description="Return users with an id greater than this (keyset pagination)"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_read_admin_user)
+):
+    # Trigram indexes need at least three characters to narrow a substring search
+    if q and match == "substring" and len(q) < 3:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Substring search requires at least 3 characters"
+        )
+    
+    # Only the columns the directory shows; the password hash is never loaded
+    query = db.query(
+        models.User.id,
+        models.User.username,
+        models.User.email,
+        models.User.is_active,
+        models.User.created_at
+    )
+    if q:
+        pattern = _like_pattern(q, match)
+        query = query.filter(or_(
+            func.lower(models.User.username).like(pattern, escape="\\"),
+            func.lower(models.User.email).like(pattern, escape="\\")
+        ))
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    
+    rows = query.order_by(models.User.id).limit(limit + 1).all()
+    items = [
+        schemas.UserDirectoryEntry(
+            id=row.id,
+            username=row.username,
+            email=row.email,
+            is_active=row.is_active,
+            created_at=row.created_at
+        )
+        for row in rows[:limit]
+    ]
+    next_after_id = items[-1].id if len(rows) > limit else None
+    
+    return schemas.UserDirectoryPage(items=items, next_after_id=next_after_id)
+
 @router.get("/{user_id}", response_model=schemas.UserResponse)
 def get_user(user_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
     user = db.query(models.User).filter(models.User.id == user_id).first()
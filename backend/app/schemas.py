@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -30,6 +30,18 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# Lightweight projection for the support directory search
+class UserDirectoryEntry(BaseModel):
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    created_at: datetime
+
+class UserDirectoryPage(BaseModel):
+    items: List[UserDirectoryEntry]
+    next_after_id: Optional[int] = None  # pass as after_id to fetch the next page
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -54,13 +66,13 @@ class InvestmentCreate(BaseModel):
     symbol: str
     name: str
     asset_type: AssetType
-    quantity: float
+    quantity: float = Field(ge=0)
     purchase_price: float
 
 class InvestmentUpdate(BaseModel):
     symbol: Optional[str] = None
     name: Optional[str] = None
-    quantity: Optional[float] = None
+    quantity: Optional[float] = Field(None, ge=0)
     current_price: Optional[float] = None
 
 class InvestmentResponse(InvestmentBase):
@@ -75,6 +87,29 @@ class InvestmentResponse(InvestmentBase):
     class Config:
         from_attributes = True
 
+# Batch items are only shape-checked when the request is parsed; each one is then
+# validated against InvestmentCreate / InvestmentUpdate so a bad item is reported
+# in its own result instead of rejecting the whole batch
+class InvestmentBatchCreate(BaseModel):
+    symbol: str
+    name: str
+    asset_type: AssetType
+    quantity: float
+    purchase_price: float
+
+class InvestmentBatchUpdate(BaseModel):
+    id: int
+    symbol: Optional[str] = None
+    name: Optional[str] = None
+    quantity: Optional[float] = None
+    current_price: Optional[float] = None
+
+class InvestmentBatchResult(BaseModel):
+    index: int  # position of the item in the request payload
+    status: str  # "created", "updated" or "error"
+    investment: Optional[InvestmentResponse] = None
+    error: Optional[str] = None
+
 # Transaction schemas
 class TransactionBase(BaseModel):
     transaction_type: TransactionType
@@ -84,6 +119,9 @@ class TransactionBase(BaseModel):
 
 class TransactionCreate(TransactionBase):
     investment_id: int
+    # Validated here so bad input is a 422 rather than a CHECK constraint violation
+    quantity: float = Field(gt=0)
+    price_per_unit: float = Field(gt=0)
 
 class TransactionResponse(TransactionBase):
     id: int
@@ -105,3 +143,54 @@ class PortfolioSummary(BaseModel):
     gain_loss_percentage: float
     investments_count: int
     transactions_count: int
+
+# Portfolio allocation schemas
+class AllocationSlice(BaseModel):
+    key: str  # asset type, symbol, or "OTHER"
+    value: float
+    percentage: float
+    holdings_count: int
+
+class PortfolioAllocation(BaseModel):
+    total_value: float
+    by_asset_type: List[AllocationSlice]
+    top_symbols: Optional[List[AllocationSlice]] = None
+
+# Admin / risk schemas
+class SymbolExposureResponse(BaseModel):
+    symbol: str
+    total_quantity: float
+    market_value: float
+    holder_count: int
+
+class ExposureHolder(BaseModel):
+    user_id: int
+    username: str
+    quantity: float
+    market_value: float
+
+class SymbolExposureDetail(SymbolExposureResponse):
+    top_holders: List[ExposureHolder]
+
+class ProfiledQuery(BaseModel):
+    statement: str
+    duration_ms: float
+
+class RequestProfile(BaseModel):
+    id: int
+    method: str
+    path: str
+    started_at: datetime
+    duration_ms: Optional[float] = None
+    status_code: Optional[int] = None
+    queries: List[ProfiledQuery]
+    profile: Optional[str] = None
+
+class SlowQuery(BaseModel):
+    recorded_at: datetime
+    statement: str
+    parameters: str
+    duration_ms: float
+    executemany: bool
+    plan: Optional[str] = None
+    profile_id: Optional[int] = None
@@ -0,0 +1,72 @@
+"""
+Per-user transaction totals for the portfolio summary, kept so it does not count every partition
+"""
+
+import os
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import func, insert, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+
+TRANSACTION_COUNT_SHARDS = int(os.getenv("TRANSACTION_COUNT_SHARDS", "8"))
+
+def _upsert(db: Session):
+    dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+    return dialect.insert(models.TransactionCount)
+
+def record_counts(db: Session, user_id: int, deltas: Dict[int, int]):
+    """
+    Add per-investment transaction deltas (investment_id -> change) to one user's total.
+
+    Runs inside the caller's transaction, after its investment and symbol_exposure writes.
+    Shards are keyed by investment so trades on different investments of one user do not
+    queue on one row; rows are written in shard order so concurrent writers lock them
+    consistently.
+    """
+    shards = Counter()
+    for investment_id, delta in deltas.items():
+        shards[investment_id % TRANSACTION_COUNT_SHARDS] += delta
+    rows = [
+        {"user_id": user_id, "shard": shard, "transaction_count": count}
+        for shard, count in sorted(shards.items())
+        if count
+    ]
+    if not rows:
+        return
+
+    stmt = _upsert(db).values(rows)
+    table = models.TransactionCount.__table__
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.shard],
+        set_={"transaction_count": table.c.transaction_count + stmt.excluded.transaction_count},
+    ))
+
+def record_count(db: Session, user_id: int, investment_id: int, delta: int):
+    record_counts(db, user_id, {investment_id: delta})
+
+def user_total(db: Session, user_id: int) -> int:
+    return db.query(func.coalesce(func.sum(models.TransactionCount.transaction_count), 0)).filter(
+        models.TransactionCount.user_id == user_id
+    ).scalar()
+
+def rebuild_statement(include_archive: bool = True):
+    """INSERT ... SELECT of the per-shard counts over the partitioned table and the archive"""
+    sources = [select(models.Transaction.user_id, models.Transaction.investment_id)]
+    if include_archive:
+        sources.append(select(models.TransactionArchive.user_id, models.TransactionArchive.investment_id))
+    rows = union_all(*sources).subquery()
+    shard = (rows.c.investment_id % TRANSACTION_COUNT_SHARDS).label("shard")
+    return insert(models.TransactionCount).from_select(
+        ["user_id", "shard", "transaction_count"],
+        select(rows.c.user_id, shard, func.count()).group_by(rows.c.user_id, shard),
+    )
+
+def rebuild_transaction_counts(db: Session):
+    """Recompute transaction_counts from the transactions and their archive"""
+    db.query(models.TransactionCount).delete()
+    db.execute(rebuild_statement())
+    db.commit()
@@ -22,7 +22,7 @@ CREATE TABLE IF NOT EXISTS investments (
     symbol VARCHAR(20) NOT NULL,
     name VARCHAR(200) NOT NULL,
     asset_type AssetType NOT NULL,
-    quantity DECIMAL(15, 4) DEFAULT 0,
+    quantity DECIMAL(15, 4) DEFAULT 0 CONSTRAINT ck_investments_quantity_non_negative CHECK (quantity >= 0),
     purchase_price DECIMAL(10, 2) NOT NULL,
     current_price DECIMAL(10, 2) DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -30,27 +30,50 @@ CREATE TABLE IF NOT EXISTS investments (
     UNIQUE(user_id, symbol)
 );
 
--- Create transactions table
+-- Create transactions table, range partitioned by month on transaction_date
+-- (monthly partitions are created and archived by maintain_partitions.py)
 CREATE TABLE IF NOT EXISTS transactions (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     investment_id INTEGER REFERENCES investments(id) ON DELETE CASCADE,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     transaction_type TransactionType NOT NULL,
     quantity DECIMAL(15, 4) NOT NULL,
     price DECIMAL(10, 2) NOT NULL,
     total_amount DECIMAL(15, 2) NOT NULL,
-    transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    transaction_date TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT,
+    PRIMARY KEY (id, transaction_date)
+) PARTITION BY RANGE (transaction_date);
+
+CREATE TABLE IF NOT EXISTS transactions_default PARTITION OF transactions DEFAULT;
+
+-- Cold transaction history moved out of the partitioned table
+CREATE TABLE IF NOT EXISTS transactions_archive (
+    id INTEGER PRIMARY KEY,
+    investment_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    transaction_type TransactionType NOT NULL,
+    quantity DECIMAL(15, 4) NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    total_amount DECIMAL(15, 2) NOT NULL,
+    transaction_date TIMESTAMPTZ NOT NULL,
     notes TEXT
 );
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE INDEX IF NOT EXISTS ix_users_username_lower_pattern ON users(lower(username) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS ix_users_email_lower_pattern ON users(lower(email) text_pattern_ops);
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_users_username_lower_trgm ON users USING gin (lower(username) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_users_email_lower_trgm ON users USING gin (lower(email) gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_investments_user_id ON investments(user_id);
 CREATE INDEX IF NOT EXISTS idx_investments_symbol ON investments(symbol);
+CREATE INDEX IF NOT EXISTS ix_investments_user_id_asset_type ON investments(user_id, asset_type) INCLUDE (quantity, current_price);
 CREATE INDEX IF NOT EXISTS idx_transactions_investment_id ON transactions(investment_id);
-CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions(user_id);
-CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(transaction_date);
+CREATE INDEX IF NOT EXISTS ix_transactions_user_id_transaction_date ON transactions(user_id, transaction_date);
+CREATE INDEX IF NOT EXISTS ix_transactions_archive_user_id_transaction_date ON transactions_archive(user_id, transaction_date);
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+"""
+Create upcoming monthly transaction partitions and archive old ones
+"""
+
+import argparse
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.partitions import maintain_partitions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--months-ahead", type=int, default=3, help="future monthly partitions to keep ready")
+    parser.add_argument("--retain-months", type=int, default=24, help="months of history kept in the hot table")
+    args = parser.parse_args()
+
+    try:
+        summary = maintain_partitions(engine, args.months_ahead, args.retain_months)
+    except Exception as e:
+        print(f"Error maintaining transaction partitions: {e}")
+        sys.exit(1)
+
+    for name in summary["created"]:
+        print(f"Created partition {name}")
+    for name, rows in summary["archived"].items():
+        print(f"Archived partition {name} ({rows} rows)")
+    print("Transaction partitions are up to date!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+"""
+One-off upgrade of an existing plain transactions table to the monthly partitioned table
+"""
+
+import argparse
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models
+from app.database import engine
+from app.partitions import convert_to_partitioned, maintain_partitions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--months-ahead", type=int, default=3, help="future monthly partitions to keep ready")
+    parser.add_argument("--retain-months", type=int, default=24, help="months of history kept in the hot table")
+    args = parser.parse_args()
+
+    try:
+        copied = convert_to_partitioned(engine)
+        # Tables added alongside partitioning (transactions_archive, ...)
+        models.Base.metadata.create_all(bind=engine)
+        summary = maintain_partitions(engine, args.months_ahead, args.retain_months)
+    except Exception as e:
+        print(f"Error migrating transactions: {e}")
+        sys.exit(1)
+
+    if copied is None:
+        print("Transactions table is already partitioned")
+    else:
+        print(f"Copied {copied} transactions into the partitioned table")
+    for name in summary["created"]:
+        print(f"Created partition {name}")
+    for name, rows in summary["archived"].items():
+        print(f"Archived partition {name} ({rows} rows)")
+    print("Transactions migration complete!")
+
+if __name__ == "__main__":
+    main()
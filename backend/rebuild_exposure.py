@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+"""
+Rebuild the symbol_exposure aggregate from the investments table
+"""
+
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.exposure import rebuild_symbol_exposure
+
+def rebuild():
+    """Recompute per-symbol totals for every user"""
+    db = SessionLocal()
+    try:
+        rebuild_symbol_exposure(db)
+        print("Symbol exposure rebuilt successfully!")
+    except Exception as e:
+        print(f"Error rebuilding symbol exposure: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
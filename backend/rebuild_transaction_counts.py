@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+"""
+Rebuild the per-user transaction_counts from transactions and their archive
+"""
+
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.transaction_counts import rebuild_transaction_counts
+
+def rebuild():
+    """Recompute transaction totals for every user"""
+    db = SessionLocal()
+    try:
+        rebuild_transaction_counts(db)
+        print("Transaction counts rebuilt successfully!")
+    except Exception as e:
+        print(f"Error rebuilding transaction counts: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,12 @@
+import os
+
+# The app loads backend/.env on import, which would point the tests at the development
+# database. Without an explicit DATABASE_URL the tests get in-memory SQLite instead and
+# the Postgres-only tests skip themselves.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Set before any app module is imported, as they read these at import time. The rate
+# limiter would turn parallel requests from one test user into 429s; its own tests
+# switch it back on.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("OUTBOX_DISPATCHER_ENABLED", "false")
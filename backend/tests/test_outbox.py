@@ -0,0 +1,152 @@
+"""
+Trade events written by the HTTP write paths and published by the outbox dispatcher.
+
+Needs a real Postgres database, since the dispatcher claims rows with SKIP LOCKED:
+
+    DATABASE_URL=postgresql://... python -m pytest tests/test_outbox.py
+
+Skipped when DATABASE_URL does not point at Postgres. Drains every pending event in
+that database, so do not point it at one whose events matter.
+"""
+
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+    pytest.skip("DATABASE_URL must point at a Postgres database", allow_module_level=True)
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+from app.outbox import EventSink, OutboxDispatcher, QueueSink
+
+class FailingSink(EventSink):
+    def publish(self, events):
+        raise RuntimeError("sink unavailable")
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+@pytest.fixture
+def user(client):
+    username = f"outbox_{uuid.uuid4().hex[:8]}"
+    response = client.post("/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "outbox-password"
+    })
+    assert response.status_code == 200, response.text
+    user_id = response.json()["id"]
+    response = client.post("/auth/login", json={"username": username, "password": "outbox-password"})
+    assert response.status_code == 200, response.text
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _drain(dispatcher: OutboxDispatcher):
+    while dispatcher.run_once():
+        pass
+
+def _pending(user_id: int) -> list:
+    db = SessionLocal()
+    try:
+        return db.query(models.OutboxEvent).filter(
+            models.OutboxEvent.user_id == user_id
+        ).order_by(models.OutboxEvent.id).all()
+    finally:
+        db.close()
+
+def _investment(symbol: str, quantity: float = 5) -> dict:
+    return {"symbol": symbol, "name": symbol, "asset_type": "STOCK", "quantity": quantity, "purchase_price": 10}
+
+def test_write_paths_enqueue_events_that_are_published_and_removed(client, user):
+    user_id, headers = user
+    suffix = uuid.uuid4().hex[:6].upper()
+
+    response = client.post("/investments/", headers=headers, json=_investment(f"A{suffix}"))
+    assert response.status_code == 200, response.text
+    investment_id = response.json()["id"]
+    response = client.post("/investments/batch", headers=headers, json=[
+        _investment(f"B{suffix}", 2),
+        _investment(f"C{suffix}", 3)
+    ])
+    assert response.status_code == 200, response.text
+    batch_ids = [result["investment"]["id"] for result in response.json()]
+    response = client.post("/transactions/", headers=headers, json={
+        "investment_id": investment_id,
+        "transaction_type": "SELL",
+        "quantity": 2,
+        "price_per_unit": 12
+    })
+    assert response.status_code == 200, response.text
+    sell_id = response.json()["id"]
+    assert client.delete(f"/transactions/{sell_id}", headers=headers).status_code == 200
+    assert client.delete(f"/investments/{investment_id}", headers=headers).status_code == 200
+
+    sink = QueueSink()
+    _drain(OutboxDispatcher([sink], batch_size=10))
+
+    published = []
+    while not sink.queue.empty():
+        event = sink.queue.get()
+        if event["user_id"] == user_id:
+            published.append(event)
+    summary = [
+        (event["event_type"], event["payload"]["investment_id"], event["payload"].get("transaction_type"))
+        for event in published
+    ]
+    assert summary == [
+        ("transaction.created", investment_id, "BUY"),
+        ("transaction.created", batch_ids[0], "BUY"),
+        ("transaction.created", batch_ids[1], "BUY"),
+        ("transaction.created", investment_id, "SELL"),
+        ("transaction.deleted", investment_id, None),
+        ("transaction.deleted", investment_id, None),
+    ]
+
+    initial_buy, sell = published[0]["payload"], published[3]["payload"]
+    assert initial_buy["quantity"] == 5 and initial_buy["position_quantity"] == 5
+    assert sell == {
+        "transaction_id": sell_id,
+        "investment_id": investment_id,
+        "symbol": f"A{suffix}",
+        "transaction_type": "SELL",
+        "quantity": 2,
+        "price_per_unit": 12,
+        "total_amount": 24,
+        "position_quantity": 3
+    }
+    # The sell was deleted on its own, the initial buy together with the investment
+    assert [event["aggregate_id"] for event in published[4:]] == [sell_id, initial_buy["transaction_id"]]
+    assert _pending(user_id) == []
+
+def test_failed_publish_is_retried_later(client, user):
+    user_id, headers = user
+    # Leaves only this test's event for the failing dispatcher to claim
+    _drain(OutboxDispatcher([QueueSink()]))
+
+    response = client.post("/investments/", headers=headers, json=_investment(f"F{uuid.uuid4().hex[:6].upper()}"))
+    assert response.status_code == 200, response.text
+
+    dispatcher = OutboxDispatcher([FailingSink()])
+    before = datetime.now(timezone.utc)
+    assert dispatcher.run_once() == 0
+
+    [event] = _pending(user_id)
+    assert event.attempts == 1
+    assert event.last_error == "sink unavailable"
+    assert event.available_at >= before + dispatcher.backoff(1)
+    # Not due yet, so the next pass leaves it alone
+    assert dispatcher.run_once() == 0
+    assert _pending(user_id)[0].attempts == 1
+
+    db = SessionLocal()
+    try:
+        db.query(models.OutboxEvent).filter(models.OutboxEvent.id == event.id).delete()
+        db.commit()
+    finally:
+        db.close()
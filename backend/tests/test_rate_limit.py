@@ -0,0 +1,63 @@
+"""
+Token bucket and 429 behaviour of the rate limiter. No database needed.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import rate_limit
+from app.rate_limit import RateLimitMiddleware, RouteLimit, TokenBucketStore
+
+def test_bucket_allows_burst_then_reports_wait_until_refill():
+    store = TokenBucketStore(max_keys=10)
+    limit = RouteLimit(capacity=2, refill_rate=0.5)
+
+    assert store.take("key", limit, now=100.0) == 0
+    assert store.take("key", limit, now=100.0) == 0
+    # Empty bucket: one token comes back after 1 / refill_rate seconds
+    assert store.take("key", limit, now=100.0) == 2.0
+    assert store.take("key", limit, now=101.0) == 1.0
+    assert store.take("key", limit, now=102.0) == 0
+
+def test_bucket_store_evicts_least_recently_used_key():
+    store = TokenBucketStore(max_keys=2)
+    limit = RouteLimit(capacity=1, refill_rate=0.1)
+
+    store.take("a", limit, now=0.0)
+    store.take("b", limit, now=0.0)
+    store.take("c", limit, now=0.0)
+    # "a" was evicted, so it starts again from a full bucket
+    assert store.take("a", limit, now=0.0) == 0
+    assert store.take("c", limit, now=0.0) > 0
+
+def test_parse_route_limits():
+    limits = rate_limit.parse_route_limits(
+        '{"/portfolio/summary/": {"capacity": 20, "refill_rate": 2}, "/auth/login": {"capacity": 3, "refill_rate": 0.05, "scope": "ip"}}'
+    )
+    assert limits == {
+        "/portfolio/summary": RouteLimit(capacity=20, refill_rate=2),
+        "/auth/login": RouteLimit(capacity=3, refill_rate=0.05, scope="ip"),
+    }
+    assert rate_limit.parse_route_limits("") == {}
+
+def test_middleware_returns_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "bucket_store", TokenBucketStore(max_keys=10))
+    monkeypatch.setattr(rate_limit, "IP_LIMIT", RouteLimit(capacity=100, refill_rate=100, scope="ip"))
+    monkeypatch.setattr(rate_limit, "ROUTE_LIMITS", {"/ping": RouteLimit(capacity=2, refill_rate=0.25, scope="ip")})
+
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert [client.get("/ping").status_code for _ in range(2)] == [200, 200]
+
+    response = client.get("/ping")
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many requests"}
+    # About 4s until the next token at 0.25 tokens per second
+    assert 3 <= int(response.headers["Retry-After"]) <= 4
@@ -0,0 +1,130 @@
+"""
+Replica routing: round-robin choice, fallback to the primary and read-your-writes.
+
+Uses DATABASE_URL as a stand-in replica next to an unreachable one, so it needs Postgres:
+
+    DATABASE_URL=postgresql://... python -m pytest tests/test_read_routing.py
+
+Skipped when DATABASE_URL does not point at Postgres.
+"""
+
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import pytest
+
+if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+    pytest.skip("DATABASE_URL must point at a Postgres database", allow_module_level=True)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from app import auth, read_routing
+from app.database import DATABASE_URL, engine, RecentWriters, ReplicaPool, create_replica_engine
+from app.main import app
+
+# Nothing listens on port 1, so connecting fails straight away
+UNREACHABLE_URL = make_url(DATABASE_URL).set(host="127.0.0.1", port=1).render_as_string(hide_password=False)
+
+@pytest.fixture
+def replica():
+    engine = create_replica_engine(DATABASE_URL)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def unreachable():
+    engine = create_replica_engine(UNREACHABLE_URL)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+@pytest.fixture
+def auth_headers(client):
+    username = f"replica_{uuid.uuid4().hex[:8]}"
+    response = client.post("/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "replica-password"
+    })
+    assert response.status_code == 200, response.text
+    response = client.post("/auth/login", json={"username": username, "password": "replica-password"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@contextmanager
+def _statements_on(engine):
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+def test_pool_alternates_and_skips_unhealthy_replica(replica, unreachable):
+    pool = ReplicaPool([replica, unreachable], check_interval=0)
+    assert [pool.choose() for _ in range(4)] == [replica, unreachable, replica, unreachable]
+
+    pool.mark_unhealthy(unreachable)
+    # Probed again on every turn (interval 0), but the probe keeps failing
+    assert [pool.choose() for _ in range(4)] == [replica] * 4
+
+    pool.mark_unhealthy(replica)
+    # A replica that answers the probe is back in rotation
+    assert pool.choose() is replica
+
+def test_read_falls_back_to_primary_when_replica_unreachable(monkeypatch, client, auth_headers, unreachable):
+    pool = ReplicaPool([unreachable], check_interval=60)
+    monkeypatch.setattr(read_routing, "replica_pool", pool)
+
+    response = client.get("/investments/", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+    assert pool.choose() is None
+
+def test_reads_stay_on_primary_right_after_a_write(monkeypatch, client, auth_headers, replica):
+    monkeypatch.setattr(read_routing, "replica_pool", ReplicaPool([replica], check_interval=60))
+    monkeypatch.setattr(read_routing, "recent_writers", RecentWriters(window=0.5))
+
+    with _statements_on(replica) as replica_statements:
+        # No write yet: the read goes to the replica
+        assert client.get("/investments/", headers=auth_headers).status_code == 200
+        assert replica_statements
+
+        replica_statements.clear()
+        response = client.post("/investments/", headers=auth_headers, json={
+            "symbol": f"R{uuid.uuid4().hex[:6].upper()}",
+            "name": "Replica test",
+            "asset_type": "STOCK",
+            "quantity": 1,
+            "purchase_price": 10
+        })
+        assert response.status_code == 200, response.text
+        investment_id = response.json()["id"]
+        response = client.get("/investments/", headers=auth_headers)
+        assert [investment["id"] for investment in response.json()] == [investment_id]
+        assert replica_statements == []
+
+        # Once the window has passed the user's reads return to the replica
+        time.sleep(0.6)
+        assert client.get("/investments/", headers=auth_headers).status_code == 200
+        assert replica_statements
+
+def test_admin_search_authenticates_on_the_replica(monkeypatch, client, auth_headers, replica):
+    username = client.get("/users/me", headers=auth_headers).json()["username"]
+    monkeypatch.setattr(auth, "ADMIN_USERNAMES", {username})
+    monkeypatch.setattr(read_routing, "replica_pool", ReplicaPool([replica], check_interval=60))
+    monkeypatch.setattr(read_routing, "recent_writers", RecentWriters(window=0.5))
+    with _statements_on(engine) as primary_statements:
+        response = client.get("/users/search", headers=auth_headers, params={"q": username})
+    assert response.status_code == 200, response.text
+    assert [user["username"] for user in response.json()["items"]] == [username]
+    assert primary_statements == []
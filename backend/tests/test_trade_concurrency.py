@@ -0,0 +1,142 @@
+"""
+Concurrency stress test for trades on a single investment.
+
+Needs a real Postgres database, since the guarantees come from row locks:
+
+    DATABASE_URL=postgresql://... python -m pytest tests/test_trade_concurrency.py
+
+Skipped when DATABASE_URL does not point at Postgres.
+"""
+
+import os
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+    pytest.skip("DATABASE_URL must point at a Postgres database", allow_module_level=True)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import case, func
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+
+TRADES = 400
+WORKERS = 16
+INITIAL_QUANTITY = 50
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+@pytest.fixture
+def auth_headers(client):
+    username = f"stress_{uuid.uuid4().hex[:8]}"
+    response = client.post("/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "stress-password"
+    })
+    assert response.status_code == 200, response.text
+    response = client.post("/auth/login", json={"username": username, "password": "stress-password"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _create_investment(client, auth_headers) -> tuple:
+    # A symbol of its own so symbol_exposure only reflects this test's investment
+    symbol = f"S{uuid.uuid4().hex[:8].upper()}"
+    response = client.post("/investments/", headers=auth_headers, json={
+        "symbol": symbol,
+        "name": "Stress test",
+        "asset_type": "STOCK",
+        "quantity": INITIAL_QUANTITY,
+        "purchase_price": 10
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"], symbol
+
+def _trade(client, auth_headers, investment_id: int, transaction_type: str, quantity: int, price: int = 10):
+    return client.post("/transactions/", headers=auth_headers, json={
+        "investment_id": investment_id,
+        "transaction_type": transaction_type,
+        "quantity": quantity,
+        "price_per_unit": price
+    })
+
+def _assert_only_expected_failures(responses):
+    # Sells beyond the current position are rejected; nothing else may fail
+    unexpected = [(r.status_code, r.text) for r in responses if r.status_code != 200
+                  and not (r.status_code == 400 and "Insufficient shares" in r.text)]
+    assert unexpected == []
+
+def _totals(investment_id: int, symbol: str) -> dict:
+    db = SessionLocal()
+    try:
+        investment = db.get(models.Investment, investment_id)
+        ledger = db.query(func.sum(case(
+            (models.Transaction.transaction_type == models.TransactionType.BUY, models.Transaction.quantity),
+            else_=-models.Transaction.quantity
+        ))).filter(models.Transaction.investment_id == investment_id).scalar()
+        exposure_quantity, exposure_value = db.query(
+            func.sum(models.SymbolExposure.total_quantity),
+            func.sum(models.SymbolExposure.market_value)
+        ).filter(models.SymbolExposure.symbol == symbol).one()
+        return {
+            "position": investment.quantity,
+            "market_value": investment.quantity * investment.current_price,
+            "ledger": ledger,
+            "exposure_quantity": exposure_quantity,
+            "exposure_value": exposure_value,
+        }
+    finally:
+        db.close()
+
+def test_parallel_trades_keep_position_ledger_and_exposure_in_sync(client, auth_headers):
+    investment_id, symbol = _create_investment(client, auth_headers)
+
+    rng = random.Random(0)
+    trades = [(rng.choice(["BUY", "SELL"]), rng.randint(1, 5)) for _ in range(TRADES)]
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        responses = list(executor.map(lambda args: _trade(client, auth_headers, investment_id, *args), trades))
+
+    _assert_only_expected_failures(responses)
+    totals = _totals(investment_id, symbol)
+    assert totals["position"] >= 0
+    assert totals["position"] == totals["ledger"] == totals["exposure_quantity"]
+
+    # The maintained per-user total matches the rows written: the initial buy plus every accepted trade
+    summary = client.get("/portfolio/summary", headers=auth_headers).json()
+    assert summary["transactions_count"] == 1 + sum(r.status_code == 200 for r in responses)
+
+def test_parallel_trades_and_updates_keep_exposure_in_sync(client, auth_headers):
+    investment_id, symbol = _create_investment(client, auth_headers)
+
+    rng = random.Random(1)
+    operations = []
+    for _ in range(TRADES):
+        kind = rng.choice(["BUY", "SELL", "PUT", "PATCH"])
+        operations.append((kind, rng.randint(1, 5), rng.randint(5, 20)))
+
+    def run(operation):
+        kind, quantity, price = operation
+        if kind == "PUT":
+            return client.put(f"/investments/{investment_id}", headers=auth_headers, json={"current_price": price})
+        if kind == "PATCH":
+            return client.patch("/investments/batch", headers=auth_headers, json=[
+                {"id": investment_id, "current_price": price}
+            ])
+        return _trade(client, auth_headers, investment_id, kind, quantity, price)
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        responses = list(executor.map(run, operations))
+
+    # Writers that take their locks in different orders deadlock, which fails a request
+    _assert_only_expected_failures(responses)
+    totals = _totals(investment_id, symbol)
+    assert totals["position"] == totals["ledger"] == totals["exposure_quantity"]
+    assert totals["market_value"] == totals["exposure_value"]
@@ -3,7 +3,7 @@
 import { useAuth } from '@/contexts/AuthContext';
 import { useRouter } from 'next/navigation';
 import { useEffect, useState } from 'react';
-import { portfolioAPI, investmentAPI, transactionAPI, Investment, Transaction, PortfolioSummary } from '@/lib/api';
+import { portfolioAPI, investmentAPI, transactionAPI, Investment, Transaction, PortfolioSummary, PortfolioAllocation } from '@/lib/api';
 import AssetAllocationChart from '@/components/AssetAllocationChart';
 import RealTimePrice, { RealTimePriceCard } from '@/components/RealTimePrice';
 import MarketOverview from '@/components/MarketOverview';
@@ -14,6 +14,7 @@ export default function DashboardPage() {
   const router = useRouter();
   const [portfolioSummary, setPortfolioSummary] = useState<PortfolioSummary | null>(null);
   const [investments, setInvestments] = useState<Investment[]>([]);
+  const [allocation, setAllocation] = useState<PortfolioAllocation | null>(null);
   const [recentTransactions, setRecentTransactions] = useState<Transaction[]>([]);
   const [loading, setLoading] = useState(true);
 
@@ -32,14 +33,16 @@ export default function DashboardPage() {
   const loadDashboardData = async () => {
     try {
       setLoading(true);
-      const [summary, investmentsData, transactionsData] = await Promise.all([
+      const [summary, investmentsData, transactionsData, allocationData] = await Promise.all([
         portfolioAPI.getSummary(),
         investmentAPI.getInvestments(),
-        transactionAPI.getTransactions(0, 5) // Get last 5 transactions
+        transactionAPI.getTransactions(0, 5), // Get last 5 transactions
+        portfolioAPI.getAllocation()
       ]);
       
       setPortfolioSummary(summary);
       setInvestments(investmentsData);
+      setAllocation(allocationData);
       setRecentTransactions(transactionsData);
     } catch (error) {
       console.error('Error loading dashboard data:', error);
@@ -286,7 +289,7 @@ export default function DashboardPage() {
                 <h3 className="text-lg leading-6 font-medium text-gray-900 mb-4">
                   Asset Allocation
                 </h3>
-                <AssetAllocationChart investments={investments} />
+                <AssetAllocationChart allocation={allocation} />
               </div>
             </div>
           </div>
@@ -1,10 +1,10 @@
 'use client';
 
 import { PieChart, Pie, Cell, ResponsiveContainer, Tooltip, Legend } from 'recharts';
-import { Investment } from '@/lib/api';
+import { PortfolioAllocation } from '@/lib/api';
 
 interface AssetAllocationChartProps {
-  investments: Investment[];
+  allocation: PortfolioAllocation | null;
 }
 
 interface ChartData {
@@ -25,33 +25,21 @@ const ASSET_COLORS = {
   CASH: '#059669',       // Emerald
 };
 
-export default function AssetAllocationChart({ investments }: AssetAllocationChartProps) {
-  // Calculate allocation by asset type
+export default function AssetAllocationChart({ allocation }: AssetAllocationChartProps) {
+  // Allocation is aggregated server-side by asset type
   const calculateAllocation = (): ChartData[] => {
-    const allocationMap = new Map<string, number>();
-    let totalValue = 0;
-
-    investments.forEach((investment) => {
-      const value = investment.current_value || 0;
-      const assetType = investment.asset_type;
-      
-      allocationMap.set(assetType, (allocationMap.get(assetType) || 0) + value);
-      totalValue += value;
-    });
-
-    const chartData: ChartData[] = [];
-    
-    allocationMap.forEach((value, assetType) => {
-      const percentage = totalValue > 0 ? (value / totalValue) * 100 : 0;
-      chartData.push({
-        name: assetType.replace('_', ' ').toLowerCase().replace(/\b\w/g, l => l.toUpperCase()),
-        value: value,
-        percentage: percentage,
-        color: ASSET_COLORS[assetType as keyof typeof ASSET_COLORS] || '#6B7280',
-      });
-    });
+    if (!allocation) {
+      return [];
+    }
 
-    return chartData.sort((a, b) => b.value - a.value);
+    return allocation.by_asset_type
+      .filter((slice) => slice.value > 0)
+      .map((slice) => ({
+        name: slice.key.replace('_', ' ').toLowerCase().replace(/\b\w/g, l => l.toUpperCase()),
+        value: slice.value,
+        percentage: slice.percentage,
+        color: ASSET_COLORS[slice.key as keyof typeof ASSET_COLORS] || '#6B7280',
+      }));
   };
 
   const chartData = calculateAllocation();
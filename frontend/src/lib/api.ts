@@ -135,6 +135,19 @@ export interface PortfolioSummary {
   transactions_count: number;
 }
 
+export interface AllocationSlice {
+  key: string;
+  value: number;
+  percentage: number;
+  holdings_count: number;
+}
+
+export interface PortfolioAllocation {
+  total_value: number;
+  by_asset_type: AllocationSlice[];
+  top_symbols?: AllocationSlice[] | null;
+}
+
 export const authAPI = {
   login: async (credentials: LoginRequest): Promise<AuthResponse> => {
     const response = await api.post<AuthResponse>('/auth/login', credentials);
@@ -204,6 +217,12 @@ export const portfolioAPI = {
     const response = await api.get<PortfolioSummary>('/portfolio/summary');
     return response.data;
   },
+
+  getAllocation: async (topN?: number): Promise<PortfolioAllocation> => {
+    const query = topN ? `?top_n=${topN}` : '';
+    const response = await api.get<PortfolioAllocation>(`/portfolio/allocation${query}`);
+    return response.data;
+  },
 };
 
 export const setAuthToken = (token: string) => {